@@ -0,0 +1,174 @@
+import importlib.util
+import os
+import statistics
+import sys
+import timeit
+from types import ModuleType
+
+import matplotlib
+import pytest
+
+matplotlib.use("Agg")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CALIBRATE_SPEED = os.path.join(ROOT, "calibrate_speed")
+FIRMWARE = os.path.join(ROOT, "upload_to_raspberry_pi_pico")
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+REFERENCE = "reference_loop"  # entry of the baseline timing reference_loop on the machine that recorded it
+MAX_ROUNDS = 15  # rounds taken at most to confirm a regression
+
+# the calibration scripts import each other as top-level modules, the way they are run from calibrate_speed/
+sys.path.insert(0, CALIBRATE_SPEED)
+
+import simulated_hal  # noqa: E402
+from create_speed_config import load_json, save_json  # noqa: E402
+
+
+def load_firmware(path: str, name: str) -> ModuleType:
+    """ import a MicroPython file of the repo under a unique name, on top of the simulated machine/utime """
+    simulated_hal.install()
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption("--benchmark-baseline", default=DEFAULT_BASELINE,
+                    help="json file holding the reference timings")
+    group.addoption("--benchmark-save", action="store_true",
+                    help="overwrite the baseline with the timings of this run")
+    group.addoption("--benchmark-threshold", type=float, default=0.5,
+                    help="tolerated slowdown against the baseline (0.5 = 50%% slower)")
+
+
+def reference_loop() -> int:
+    """ fixed pure Python workload, timed to compare the speed of this machine with the one of the baseline """
+    total = 0
+    for i in range(10 ** 5):
+        total += i * i % 7
+    return total
+
+
+class BenchmarkSession:
+    """
+    keep the baseline and the results of the current run.
+    The baseline is scaled by the time of reference_loop on this machine against the machine that recorded it,
+    so that a slower machine does not fail every benchmark.
+    """
+
+    def __init__(self, path: str, save: bool, threshold: float):
+        """
+        init function
+        :param path: json file of the baseline
+        :param save: overwrite the baseline at the end of the session
+        :param threshold: tolerated slowdown before failing
+        """
+        self.path = path
+        self.save = save
+        self.threshold = threshold
+        self.baseline = load_json(path) if os.path.exists(path) else {}
+        self.results = {}
+        self._scale = None
+
+    @property
+    def scale(self) -> float:
+        """ time of reference_loop on this machine over its time on the machine of the baseline """
+        if self._scale is None:
+            self._sample(REFERENCE, reference_loop, rounds=5)
+            reference = self.baseline.get(REFERENCE)
+            self._scale = 1. if reference is None else self.results[REFERENCE]["seconds"] / reference["seconds"]
+
+        return self._scale
+
+    def _sample(self, name: str, func, rounds: int) -> tuple:
+        """
+        time one call of a callable over several rounds.
+        The number of calls per round is picked by timeit so that a round lasts at least 0.2 s,
+        the best round is kept since the rest of the machine can only slow a round down.
+        :return: the time of one call of each round, the timer and the number of calls per round
+        """
+        timer = timeit.Timer(func)
+        number, time_taken = timer.autorange()
+        samples = [time_taken / number] + [t / number for t in timer.repeat(repeat=rounds, number=number)]
+        self.results[name] = {"seconds": min(samples), "calls_per_round": number, "rounds": len(samples)}
+
+        return samples, timer, number
+
+    def measure(self, name: str, func, rounds: int = 5) -> float:
+        """
+        time a callable and compare it against the baseline.
+        The best round must not be slower than the scaled baseline by more than the threshold plus the noise
+        of the rounds (median against best). A slower one is confirmed on more rounds before failing,
+        so that a single disturbed round of a benchmark that lasts seconds is not reported as a regression.
+        :return: the time of one call in seconds
+        """
+        samples, timer, number = self._sample(name, func, rounds)
+
+        reference = self.baseline.get(name)
+        if reference is None or self.save:
+            return min(samples)
+
+        expected = reference["seconds"] * self.scale
+
+        def limit() -> float:
+            noise = statistics.median(samples) / min(samples) - 1
+            return expected * (1 + self.threshold + noise)
+
+        while min(samples) > limit() and len(samples) < MAX_ROUNDS:
+            samples.extend(t / number for t in timer.repeat(repeat=rounds, number=number))
+
+        per_call = min(samples)
+        self.results[name].update(seconds=per_call, rounds=len(samples))
+        assert per_call <= limit(), \
+            f"{name} regressed: {per_call * 1e3:.3f} ms per call over {len(samples)} rounds, " \
+            f"baseline {expected * 1e3:.3f} ms on this machine ({reference['seconds'] * 1e3:.3f} ms recorded)"
+
+        return per_call
+
+    def write(self) -> None:
+        """ save the results: everything when asked, otherwise only the benchmarks missing from the baseline """
+        if not self.results:
+            return
+
+        # the time of reference_loop is recorded along with the timings
+        scale = self.scale
+
+        if self.save:
+            baseline = {**self.baseline, **self.results}
+        else:
+            # the new benchmarks are recorded at the speed of the machine of the baseline
+            missing = {name: {**result, "seconds": result["seconds"] / scale}
+                       for name, result in self.results.items() if name not in self.baseline}
+            if self.baseline and REFERENCE not in self.baseline:
+                missing.pop(REFERENCE)  # the timings of the baseline come from an unknown machine
+            baseline = {**self.baseline, **missing}
+
+        if baseline != self.baseline:
+            save_json(path=self.path, json_to_save=dict(sorted(baseline.items())))
+
+
+@pytest.fixture(scope="session")
+def benchmark_session(request):
+    session = BenchmarkSession(
+        path=request.config.getoption("--benchmark-baseline"),
+        save=request.config.getoption("--benchmark-save"),
+        threshold=request.config.getoption("--benchmark-threshold")
+    )
+    yield session
+    session.write()
+
+
+@pytest.fixture
+def bench(benchmark_session):
+    """ time a callable under the given name, fail if it is slower than the baseline """
+    return benchmark_session.measure
+
+
+@pytest.fixture
+def board():
+    """ simulated board with a fresh virtual clock """
+    hal = simulated_hal.install()
+    hal.reset()
+    return hal
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+SPEED_COLUMN = "rotation_speed(°/s)"
+
+
+def time_analysis(n_steps: int, n_waits: int, max_wait_s: float = 0.005, seed: int = 0) -> pd.DataFrame:
+    """
+    build an acquisition dataset shaped like data/time_analysis_raspberry_pico_*.csv.
+    The rotation speed of each step follows the hyperbola fitted by create_speed_config.model, plus noise
+    :param n_steps: number of distinct steps
+    :param n_waits: number of waiting times per step
+    """
+    rng = np.random.default_rng(seed)
+
+    steps = np.repeat(np.arange(n_steps, 0, -1), n_waits)
+    waiting_time = np.tile(np.linspace(max_wait_s, max_wait_s / n_waits, n_waits), n_steps)
+
+    a = 2500 / steps
+    b = rng.uniform(1, 4, n_steps).repeat(n_waits)
+    speed = a / (waiting_time * 1000) + b + rng.normal(0, 0.2, steps.size)
+
+    return pd.DataFrame({SPEED_COLUMN: speed, "steps": steps, "waiting_time(s)": waiting_time})
+
+
+def parameters(n_steps: int, seed: int = 0) -> tuple:
+    """
+    build the output of create_speed_config.build_params for many steps
+    :return: parameters, max_speed_all, min_speed_all
+    """
+    rng = np.random.default_rng(seed)
+
+    parameters = {}
+    for step in range(n_steps, 0, -1):
+        min_speed = round(5 + 600 / step + rng.uniform(0, 1), 2)
+        max_speed = round(min_speed + 100 + rng.uniform(0, 100), 2)
+        parameters[step] = {
+            "min_speed": min_speed,
+            "max_speed": max_speed,
+            "params": [2500 / step, 2.],
+            "mae": "0.5 degree/s"
+        }
+
+    max_speed_all = max(value["max_speed"] for value in parameters.values())
+    min_speed_all = min(value["min_speed"] for value in parameters.values())
+
+    return parameters, max_speed_all, min_speed_all
+
+
+def speed_config(n_bands: int, min_speed: float = 7., max_speed: float = 314.) -> dict:
+    """ build a servo speed_config splitting [min_speed, max_speed] into n_bands contiguous bands """
+    edges = np.linspace(min_speed, max_speed, n_bands + 1)
+
+    return {
+        str(n_bands - band): {
+            "min_speed": float(edges[band]),
+            "max_speed": float(edges[band + 1]),
+            "params": [2500 / (n_bands - band), 2.],
+            "mae": "0.5 degree/s"
+        }
+        for band in range(n_bands)
+    }
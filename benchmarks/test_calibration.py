@@ -0,0 +1,96 @@
+import shutil
+
+import matplotlib.pyplot as plt
+import pandas as pd
+import pytest
+
+import create_speed_config
+import visualize_data_rotation
+from benchmarks import synthetic
+from benchmarks.conftest import CALIBRATE_SPEED
+from create_speed_config import INIT_PARAMS_MODEL, MAX_SPEED_SERVO_SPECS, MIN_MAE
+from dataset_store import CalibrationStore
+
+pytestmark = pytest.mark.filterwarnings("ignore::RuntimeWarning")
+
+SERVOS = ["servo_sg9", "servo_s53_20"]
+
+
+def read_time_analysis(name_servo: str) -> pd.DataFrame:
+    return pd.read_csv(f"{CALIBRATE_SPEED}/data/time_analysis_raspberry_pico_{name_servo}.csv")
+
+
+def build_params(df: pd.DataFrame) -> tuple:
+    return create_speed_config.build_params(
+        groups=create_speed_config.groups_from_dataframe(df, max_speed_servo_specs=MAX_SPEED_SERVO_SPECS),
+        init_params_model=INIT_PARAMS_MODEL, min_mae=MIN_MAE,
+        max_speed_servo_specs=MAX_SPEED_SERVO_SPECS, plot_graph=False
+    )
+
+
+@pytest.mark.parametrize("name_servo", SERVOS)
+def test_read_time_analysis(bench, name_servo):
+    bench(f"read_time_analysis[{name_servo}]", lambda: read_time_analysis(name_servo))
+
+
+@pytest.mark.parametrize("name_servo", SERVOS)
+def test_build_params(bench, capsys, name_servo):
+    df = read_time_analysis(name_servo)
+
+    parameters, _, _ = build_params(df)
+    assert parameters
+
+    bench(f"build_params[{name_servo}]", lambda: build_params(df))
+
+
+def test_build_params_synthetic(bench, capsys):
+    df = synthetic.time_analysis(n_steps=1000, n_waits=100)
+
+    bench("build_params[1000x100]", lambda: build_params(df))
+
+
+@pytest.mark.parametrize("name_servo", SERVOS)
+def test_build_params_from_store(bench, capsys, tmp_path, name_servo):
+    store = CalibrationStore.from_csv(
+        f"{CALIBRATE_SPEED}/data/time_analysis_raspberry_pico_{name_servo}.csv", group_by="steps", path=str(tmp_path))
+
+    def build():
+        return create_speed_config.build_params(
+            groups=create_speed_config.groups_from_store(store=store, max_speed_servo_specs=MAX_SPEED_SERVO_SPECS),
+            init_params_model=INIT_PARAMS_MODEL, min_mae=MIN_MAE,
+            max_speed_servo_specs=MAX_SPEED_SERVO_SPECS, plot_graph=False
+        )
+
+    assert build() == build_params(read_time_analysis(name_servo))
+    bench(f"build_params_from_store[{name_servo}]", build)
+
+
+@pytest.mark.parametrize("name_servo", SERVOS)
+def test_clean_up_parameters(bench, capsys, name_servo):
+    parameters, max_speed_all, min_speed_all = build_params(read_time_analysis(name_servo))
+
+    def clean_up():
+        return create_speed_config.clean_up_parameters(
+            parameters=parameters, max_speed_all=max_speed_all, min_speed_all=min_speed_all)
+
+    assert len(clean_up()) >= 2
+    bench(f"clean_up_parameters[{name_servo}]", clean_up)
+
+
+def test_clean_up_parameters_synthetic(bench):
+    parameters, max_speed_all, min_speed_all = synthetic.parameters(n_steps=5000)
+
+    bench("clean_up_parameters[5000]", lambda: create_speed_config.clean_up_parameters(
+        parameters=parameters, max_speed_all=max_speed_all, min_speed_all=min_speed_all))
+
+
+def test_visualize_data_rotation(bench, capsys, monkeypatch, tmp_path):
+    # run() reads data/ of the current folder and creates the store next to the csv: work on a copy
+    shutil.copytree(f"{CALIBRATE_SPEED}/data", tmp_path / "data")
+    monkeypatch.chdir(tmp_path)
+
+    def run():
+        visualize_data_rotation.run()
+        plt.close("all")
+
+    bench("visualize_data_rotation.run", run, rounds=3)
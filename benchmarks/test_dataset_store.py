@@ -0,0 +1,126 @@
+import os
+
+import numpy as np
+import pytest
+
+from benchmarks import synthetic
+from benchmarks.conftest import CALIBRATE_SPEED
+from dataset_store import CalibrationStore
+
+HEADERS = [synthetic.SPEED_COLUMN, "steps", "waiting_time(s)"]
+
+
+@pytest.fixture(scope="module")
+def synthetic_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp("csv") / "time_analysis_synthetic.csv"
+    synthetic.time_analysis(n_steps=1000, n_waits=100).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def synthetic_store(tmp_path, synthetic_csv):
+    return CalibrationStore.from_csv(synthetic_csv, group_by="steps", path=str(tmp_path / "store"))
+
+
+def test_import_csv(bench, tmp_path, synthetic_csv):
+    paths = iter(range(10 ** 6))
+
+    def import_csv():
+        CalibrationStore.from_csv(synthetic_csv, group_by="steps", path=str(tmp_path / str(next(paths))))
+
+    bench("store_import_csv[1000x100]", import_csv, rounds=3)
+
+
+def test_open_store(bench, synthetic_store, synthetic_csv):
+    path = synthetic_store._path
+
+    def open_store():
+        return CalibrationStore.from_csv(synthetic_csv, group_by="steps", path=path).load()
+
+    assert len(open_store()) == 1000 * 100
+    bench("store_open[1000x100]", open_store)
+
+
+def test_groups(bench, synthetic_store):
+    def iterate():
+        for _, rows in synthetic_store.groups():
+            rows["rotation_speed"].sum()
+
+    bench("store_groups[1000x100]", iterate)
+
+
+def test_append(bench, tmp_path):
+    df = synthetic.time_analysis(n_steps=18, n_waits=101)
+    columns = {header: df[header].to_numpy() for header in HEADERS}
+    store = CalibrationStore.create(path=str(tmp_path / "store"), headers=HEADERS, group_by="steps")
+
+    bench("store_append[18x101]", lambda: store.append(columns))
+
+    store.compact()
+    assert len(store.steps) == 18
+    assert np.array_equal(store.group(18)["waiting_time"][:101], columns["waiting_time(s)"][:101])
+
+
+def test_csv_round_trip(tmp_path):
+    csv_path = f"{CALIBRATE_SPEED}/data/time_analysis_raspberry_pico_servo_sg9.csv"
+    store = CalibrationStore.from_csv(csv_path, group_by="steps", path=str(tmp_path / "store"))
+    store.export_csv(str(tmp_path / "export.csv"))
+
+    exported = CalibrationStore.from_csv(str(tmp_path / "export.csv"), group_by="steps", path=str(tmp_path / "copy"))
+    assert exported.steps == store.steps
+    assert np.array_equal(exported.load(), store.load())
+
+
+def test_csv_header_only(tmp_path):
+    csv_path = tmp_path / "time_analysis_interrupted.csv"
+    csv_path.write_text(",".join(HEADERS) + "\n", encoding="utf-8")
+
+    store = CalibrationStore.from_csv(str(csv_path), group_by="steps")
+    assert len(store) == 0 and store.steps == []
+    assert not store.import_csv(str(csv_path))  # recorded: not imported again
+
+    # the run goes on: its rows replace the empty import
+    synthetic.time_analysis(n_steps=18, n_waits=101).to_csv(csv_path, index=False)
+    assert len(CalibrationStore.from_csv(str(csv_path), group_by="steps")) == 18 * 101
+
+
+def test_csv_touched_or_overwritten(tmp_path):
+    csv_path = tmp_path / "time_analysis_synthetic.csv"
+    df = synthetic.time_analysis(n_steps=18, n_waits=101)
+    df.to_csv(csv_path, index=False)
+    store = CalibrationStore.from_csv(str(csv_path), group_by="steps")
+    rows = len(store.load())
+
+    # a touch or a checkout changes the mtime, not the content
+    os.utime(csv_path, (0, 0))
+    assert len(CalibrationStore.from_csv(str(csv_path), group_by="steps").load()) == rows
+
+    # an overwrite replaces the rows of the file instead of adding them
+    df.head(500).to_csv(csv_path, index=False)
+    store = CalibrationStore.from_csv(str(csv_path), group_by="steps")
+    assert np.array_equal(store.load()["waiting_time"], df["waiting_time(s)"].to_numpy()[:500])
+    assert len(store._index["segments"]) == 1
+    assert len(os.listdir(store._path)) == 2
+
+
+def test_import_csv_appends_runs(tmp_path, synthetic_csv):
+    df = synthetic.time_analysis(n_steps=18, n_waits=101)
+    df.to_csv(tmp_path / "run_1.csv", index=False)
+    df.to_csv(tmp_path / "run_2.csv", index=False)
+    store = CalibrationStore.create(path=str(tmp_path / "store"), headers=HEADERS, group_by="steps")
+
+    assert store.import_csv(str(tmp_path / "run_1.csv"))
+    assert not store.import_csv(str(tmp_path / "run_2.csv"))  # same content
+
+    synthetic.time_analysis(n_steps=18, n_waits=50).to_csv(tmp_path / "run_2.csv", index=False)
+    assert store.import_csv(str(tmp_path / "run_2.csv"))
+    assert len(store.load()) == 18 * (101 + 50)
+
+
+def test_from_csv_group_by_mismatch(tmp_path, synthetic_csv):
+    CalibrationStore.from_csv(synthetic_csv, group_by="steps", path=str(tmp_path / "store"))
+
+    with pytest.raises(ValueError):
+        CalibrationStore.from_csv(synthetic_csv, group_by="waiting_time(s)", path=str(tmp_path / "store"))
+    with pytest.raises(ValueError):
+        CalibrationStore.from_csv(synthetic_csv, path=str(tmp_path / "store"))
@@ -0,0 +1,68 @@
+import os
+import shutil
+
+import pytest
+
+import report
+from benchmarks.conftest import CALIBRATE_SPEED, load_json
+
+pytestmark = pytest.mark.filterwarnings("ignore::RuntimeWarning")
+
+
+def test_report_cached(bench, capsys, tmp_path):
+    output_dir = str(tmp_path / "report")
+    data = sorted(os.listdir(os.path.join(CALIBRATE_SPEED, "data")))
+    report.run(data_dir=os.path.join(CALIBRATE_SPEED, "data"), output_dir=output_dir, workers=2)
+
+    cache = load_json(os.path.join(output_dir, report.CACHE_FILE))
+    assert sorted(cache) == ["servo_s53_20/rotation_results", "servo_s53_20/time_analysis",
+                             "servo_sg9/rotation_results", "servo_sg9/time_analysis"]
+    assert all(os.path.exists(os.path.join(output_dir, job["result"]["figure"])) for job in cache.values())
+
+    # nothing changed: every figure comes from the cache
+    bench("report.run[cached]", lambda: report.run(
+        data_dir=os.path.join(CALIBRATE_SPEED, "data"), output_dir=output_dir, workers=2), rounds=3)
+    assert "(0 rendered, 4 from the cache)" in capsys.readouterr().out
+
+    # the data folder is only read
+    assert sorted(os.listdir(os.path.join(CALIBRATE_SPEED, "data"))) == data
+
+
+def test_report_renders_changed_csv(capsys, tmp_path):
+    data_dir = tmp_path / "data"
+    shutil.copytree(os.path.join(CALIBRATE_SPEED, "data"), data_dir)
+    output_dir = str(tmp_path / "report")
+    report.run(data_dir=str(data_dir), output_dir=output_dir, workers=2)
+
+    # a touch does not change the content, an overwrite does
+    csv_path = data_dir / "data_rotation_results_servo_sg9.csv"
+    os.utime(csv_path)
+    report.run(data_dir=str(data_dir), output_dir=output_dir, workers=2)
+    assert "(0 rendered, 4 from the cache)" in capsys.readouterr().out
+
+    lines = csv_path.read_text(encoding="utf-8").splitlines(keepends=True)
+    csv_path.write_text("".join(lines[:len(lines) // 2]), encoding="utf-8")
+    report.run(data_dir=str(data_dir), output_dir=output_dir, workers=2)
+    assert "(1 rendered, 3 from the cache)" in capsys.readouterr().out
+
+    cache = load_json(os.path.join(output_dir, report.CACHE_FILE))
+    assert cache["servo_sg9/rotation_results"]["key"] == report.cache_key(csv_path.read_bytes(), report.SETTINGS)
+    assert sorted(os.listdir(data_dir)) == sorted(os.listdir(os.path.join(CALIBRATE_SPEED, "data")))
+
+
+def test_report_without_figure(capsys, tmp_path):
+    # interrupted acquisitions: no step reaches the MAE threshold, no data to regress
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for name in ["time_analysis_raspberry_pico_servo_empty.csv", "data_rotation_results_servo_empty.csv"]:
+        shutil.copy(os.path.join(CALIBRATE_SPEED, "data", name.replace("empty", "sg9")), data_dir / name)
+        lines = (data_dir / name).read_text(encoding="utf-8").splitlines(keepends=True)
+        (data_dir / name).write_text(lines[0], encoding="utf-8")
+
+    output_dir = str(tmp_path / "report")
+    path = report.run(data_dir=str(data_dir), output_dir=output_dir, workers=2)
+    with open(path, encoding="utf-8") as infile:
+        assert "<img" not in infile.read()
+
+    report.run(data_dir=str(data_dir), output_dir=output_dir, workers=2)
+    assert "(0 rendered, 2 from the cache)" in capsys.readouterr().out
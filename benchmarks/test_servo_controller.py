@@ -0,0 +1,142 @@
+import os
+
+import pytest
+
+import simulate_acquisition
+import simulated_hal
+from benchmarks import synthetic
+from benchmarks.conftest import CALIBRATE_SPEED, FIRMWARE, load_firmware, load_json
+from servo_model import SimulatedServo
+
+
+@pytest.fixture(scope="module")
+def servo_motor():
+    return load_firmware(os.path.join(FIRMWARE, "servo_motor.py"), "benchmarked_servo_motor")
+
+
+@pytest.fixture(scope="module")
+def conf():
+    return load_json(os.path.join(FIRMWARE, "params", "servo_params.json"))
+
+
+@pytest.fixture(scope="module")
+def models(tmp_path_factory):
+    """ servo models fitted on the acquisition data, without noise """
+    models = {}
+    for name_servo in ["servo_sg9", "servo_s53_20"]:
+        models[name_servo] = simulate_acquisition.fit_model(
+            name_servo, data_dir=os.path.join(CALIBRATE_SPEED, "data"), store_path=str(tmp_path_factory.mktemp("store")))
+        models[name_servo].noise = 0.
+
+    return models
+
+
+@pytest.fixture(params=["servo_sg9", "servo_s53_20"])
+def name_servo(request):
+    return request.param
+
+
+@pytest.fixture
+def servo(board, servo_motor, conf, name_servo):
+    return servo_motor.ServoController(signal_pin=0, **conf[name_servo])
+
+
+def sweep(servo, percent_speed: float) -> None:
+    """ one back and forth rotation over the whole range """
+    servo.go_to_position(angle=-90, percent_speed=percent_speed)
+    servo.go_to_position(angle=90, percent_speed=percent_speed)
+
+
+def rotation_speed(board, servo, percent_speed: float) -> float:
+    """ speed measured as by the acquisition: from -90° until the photo interrupter at 90° triggers """
+    servo.go_to_position(angle=-90, percent_speed=100)
+    board.advance_us(10 ** 6)
+
+    start = board.now_us
+    servo.go_to_position(angle=90, percent_speed=percent_speed)
+    photo_intercept = simulated_hal.Pin(1, simulated_hal.Pin.IN)
+    while not photo_intercept.value():
+        board.advance_us(10)
+
+    return 180 * 10 ** 6 / (board.now_us - start)
+
+
+@pytest.mark.parametrize("percent_speed", [0, 50, 100])
+def test_go_to_position(bench, board, name_servo, servo, percent_speed):
+    writes = board.pwm_writes
+    sweep(servo, percent_speed)
+    assert board.pwm_writes > writes
+
+    bench(f"go_to_position[{name_servo}-{percent_speed}]", lambda: sweep(servo, percent_speed))
+
+
+@pytest.mark.parametrize("percent_speed", [0, 33.3, 50, 99.5, 100])
+def test_go_to_position_fractional(bench, board, servo_motor, conf, name_servo, servo, percent_speed):
+    fractional = servo_motor.ServoController(signal_pin=0, fractional_stepping=True, **conf[name_servo])
+
+    def move(controller) -> tuple:
+        controller.go_to_position(angle=-90, percent_speed=100)
+        writes, start = board.pwm_writes, board.now_us
+        controller.go_to_position(angle=90, percent_speed=percent_speed)
+        return board.pwm_writes - writes, board.now_us - start
+
+    assert move(fractional)[0] < move(servo)[0]
+
+    bench(f"go_to_position_fractional[{name_servo}-{percent_speed}]",
+          lambda: sweep(fractional, percent_speed))
+
+
+@pytest.mark.parametrize("percent_speed", [25, 50, 75])
+def test_fractional_rotation_speed(board, servo_motor, conf, models, name_servo, percent_speed):
+    SimulatedServo(models[name_servo])
+    fractional = servo_motor.ServoController(signal_pin=0, fractional_stepping=True, **conf[name_servo])
+    integer = servo_motor.ServoController(signal_pin=0, **conf[name_servo])
+
+    # the calibration includes the write overhead: the fractional mode keeps the speed of the integer mode
+    speed = rotation_speed(board, fractional, percent_speed)
+    assert speed == pytest.approx(rotation_speed(board, integer, percent_speed), rel=0.03)
+
+    target = fractional._min_speed + percent_speed * (fractional._max_speed - fractional._min_speed) / 100
+    assert speed == pytest.approx(target, rel=0.05)
+
+
+def test_angle_to_duty(bench, name_servo, servo):
+    angles = range(-servo._max_angle // 2, servo._max_angle // 2 + 1)
+
+    def convert():
+        for angle in angles:
+            servo._angle_to_duty(angle=angle)
+
+    bench(f"angle_to_duty[{name_servo}]", convert)
+
+
+def test_get_variable_set(bench, name_servo, servo):
+    def select():
+        for percent_speed in range(101):
+            servo._get_variable_set(percent_speed)
+
+    bench(f"get_variable_set[{name_servo}]", select)
+
+
+def test_get_variable_set_many_bands(bench, board, servo_motor):
+    # more bands than a servo has steps: only the band lookup is exercised here
+    servo = servo_motor.ServoController(
+        signal_pin=0, speed_config=synthetic.speed_config(n_bands=180), min_speed_d_s=7., max_speed_d_s=314.)
+    servo._speed_config = synthetic.speed_config(n_bands=5000)
+
+    def select():
+        for percent_speed in range(101):
+            servo._get_variable_set(percent_speed)
+
+    bench("get_variable_set[5000-bands]", select)
+
+
+def test_go_to_position_many_bands(bench, board, servo_motor):
+    servo = servo_motor.ServoController(
+        signal_pin=0, speed_config=synthetic.speed_config(n_bands=180), min_speed_d_s=7., max_speed_d_s=314.)
+
+    def sweeps():
+        for percent_speed in range(0, 101, 10):
+            sweep(servo, percent_speed)
+
+    bench("go_to_position[180-bands]", sweeps)
@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+import pytest
+
+import simulate_acquisition
+from benchmarks.conftest import CALIBRATE_SPEED
+from dataset_store import CalibrationStore
+from servo_model import SPEED_COLUMN
+
+SERVOS = ["servo_sg9", "servo_s53_20"]
+
+
+def fit_model(name_servo: str, store_path: str):
+    return simulate_acquisition.fit_model(
+        name_servo, data_dir=os.path.join(CALIBRATE_SPEED, "data"), store_path=store_path)
+
+
+@pytest.fixture(scope="module", params=SERVOS)
+def fitted(request, tmp_path_factory):
+    return request.param, fit_model(request.param, store_path=str(tmp_path_factory.mktemp("store")))
+
+
+def test_fit(bench, tmp_path, fitted):
+    name_servo, model = fitted
+    bench(f"servo_model_fit[{name_servo}]", lambda: fit_model(name_servo, store_path=str(tmp_path / "store")))
+
+    # the model reproduces the shipped acquisition
+    data = CalibrationStore.from_csv(f"{CALIBRATE_SPEED}/data/time_analysis_raspberry_pico_{name_servo}.csv",
+                                     group_by="steps", path=str(tmp_path / "store")).load()
+    synthetic = model.time_analysis(data["steps"], data["waiting_time"], seed=None)
+    assert np.median(np.abs(synthetic[SPEED_COLUMN] / data["rotation_speed"] - 1)) < 0.01
+
+
+def test_time_analysis_vectorized(bench, fitted):
+    name_servo, model = fitted
+    steps = np.arange(180, 0, -1)[:, None]
+    waiting_time_s = np.linspace(0.005, 0, 5556)[None, :]
+
+    samples = model.time_analysis(steps, waiting_time_s)
+    assert len(samples["steps"]) > 10 ** 6
+
+    bench(f"servo_model_time_analysis[{name_servo}-1M]", lambda: model.time_analysis(steps, waiting_time_s), rounds=3)
+
+
+@pytest.mark.parametrize("percent_waiting, step", [(100, 180), (50, 90), (0, 10)])
+def test_acquisition_epoch(bench, capsys, tmp_path, monkeypatch, fitted, percent_waiting, step):
+    name_servo, model = fitted
+    main = simulate_acquisition.load_acquisition(model=model, name_servo=name_servo, output_dir=str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    acquisition = main()
+    acquisition._init_position()
+
+    # firmware in the loop against the expected time of the model
+    acquisition._run(percent_waiting=percent_waiting, step=step)
+    simulated = float(capsys.readouterr().out.split("rotation_speed(°/s): ")[1].split(" ")[0])
+    waiting_time_us = round(acquisition._servo._max_sleep * percent_waiting / 100)
+    expected = 180 / model.rotation_time(step, waiting_time_us)
+    assert simulated == pytest.approx(expected, rel=0.1)
+
+    bench(f"acquisition_epoch[{name_servo}-{percent_waiting}-{step}]",
+          lambda: acquisition._run(percent_waiting=percent_waiting, step=step), rounds=3)
@@ -1,5 +1,5 @@
 import json
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -7,6 +7,12 @@ import pandas as pd
 from scipy.optimize import minimize
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 
+from dataset_store import CalibrationStore
+
+INIT_PARAMS_MODEL = [24.36093280680071, 3.6269641385313385]
+MAX_SPEED_SERVO_SPECS = 600
+MIN_MAE = 0.9
+
 
 def load_json(path: str) -> dict:
     """
@@ -52,8 +58,11 @@ def plot(x: list, y: list, y_p: list) -> None:
     plt.show()
 
 
-def plot_3d(x: list, y: list, y_p: list) -> None:
-    """ plot a 3D graph """
+def plot_3d(x: list, y: list, y_p: list, path: Optional[str] = None) -> None:
+    """
+    plot a 3D graph
+    :param path: save the graph in this file instead of showing it
+    """
     fig = plt.figure()
     ax = fig.add_subplot(projection='3d')
 
@@ -72,7 +81,11 @@ def plot_3d(x: list, y: list, y_p: list) -> None:
     ax.view_init(45, 0)
     ax.legend()
 
-    plt.show()
+    if path is None:
+        plt.show()
+    else:
+        fig.savefig(path)
+        plt.close(fig)
 
 
 def regression(x: np.array, y: np.array, params_model: list) -> Optional[tuple]:
@@ -132,20 +145,39 @@ def clean_up_parameters(parameters: dict, max_speed_all: float, min_speed_all: f
     return clean_parameters
 
 
-def build_params(df: pd.DataFrame, init_params_model: list, min_mae: float,
-                 max_speed_servo_specs: int, plot_graph: bool = True) -> tuple:
-    """ do the regression and save the parameters in a config"""
+def groups_from_store(store: CalibrationStore, max_speed_servo_specs: int) -> Iterator[tuple]:
+    """ (step, waiting time in ms, rotation speed) of each step, the steps are slices of the store """
+    for step, rows in store.groups():
+        keep = rows["rotation_speed"] <= max_speed_servo_specs
+        if not keep.all():
+            rows = rows[keep]
+
+        yield step, rows["waiting_time"] * 1000, rows["rotation_speed"]
+
+
+def groups_from_dataframe(df: pd.DataFrame, max_speed_servo_specs: int) -> Iterator[tuple]:
+    """ (step, waiting time in ms, rotation speed) of each step of a DataFrame read from the csv """
+    df = df[df["rotation_speed(°/s)"] <= max_speed_servo_specs]
+
+    for step, val in df.groupby("steps", sort=False):
+        yield step, val["waiting_time(s)"].to_numpy() * 1000, val["rotation_speed(°/s)"].to_numpy()
+
+
+def build_params(groups: Iterable[tuple], init_params_model: list, min_mae: float,
+                 max_speed_servo_specs: int, plot_graph: bool = True, plot_path: Optional[str] = None) -> tuple:
+    """
+    do the regression and save the parameters in a config
+    :param plot_graph: plot the real and predicted speeds
+    :param plot_path: save the plot in this file instead of showing it
+    """
 
     values = []
     parameters = {}
     min_speed_all = max_speed_servo_specs
     max_speed_all = 0
 
-    for i in df["steps"].unique():
+    for i, x, y in groups:
         print(f"step: {i}")
-        val = df[df["steps"] == i]
-        x = val["waiting_time(ms)"].to_numpy()
-        y = val["rotation_speed(°/s)"].to_numpy()
 
         res, y_p, mae = regression(x=x, y=y, params_model=init_params_model)
         mae = min_mae + 1 if mae is None else mae
@@ -177,9 +209,9 @@ def build_params(df: pd.DataFrame, init_params_model: list, min_mae: float,
             values.extend([[i, x[ind - 1], y[ind - 1], y_p[ind - 1]] for ind in range(1, len(x) + 1)])
         # plot(x, y, y_p)
 
-    if plot_graph:
+    if plot_graph and values:
         values = np.array(values)
-        plot_3d([values[:, 0], values[:, 1]], values[:, 2], values[:, 3])
+        plot_3d([values[:, 0], values[:, 1]], values[:, 2], values[:, 3], path=plot_path)
 
     return parameters, max_speed_all, min_speed_all
 
@@ -207,9 +239,6 @@ def run():
     """ core method to perform the analysis """
 
     name_servo = "servo_sg9"
-    init_params_model = [24.36093280680071, 3.6269641385313385]
-    max_speed_servo_specs = 600
-    min_mae = 0.9
 
     path_config_load = "./upload_to_rpp_for_data_acquisition/params/servo_params.json"
     path_config_saves = [
@@ -217,15 +246,13 @@ def run():
         "./upload_to_rpp_for_data_visualization/params/servo_params.json"
     ]
 
-    df = pd.read_csv(f"data/time_analysis_raspberry_pico_{name_servo}.csv")
-
-    df = df[df["rotation_speed(°/s)"] <= max_speed_servo_specs]
-    df["waiting_time(ms)"] = df["waiting_time(s)"] * 1000
+    store = CalibrationStore.from_csv(f"data/time_analysis_raspberry_pico_{name_servo}.csv", group_by="steps")
 
     parameters, max_speed_all, min_speed_all = \
         build_params(
-            df=df, init_params_model=init_params_model, min_mae=min_mae,
-            max_speed_servo_specs=max_speed_servo_specs, plot_graph=True
+            groups=groups_from_store(store=store, max_speed_servo_specs=MAX_SPEED_SERVO_SPECS),
+            init_params_model=INIT_PARAMS_MODEL, min_mae=MIN_MAE,
+            max_speed_servo_specs=MAX_SPEED_SERVO_SPECS, plot_graph=True
         )
 
     # Clean up unnecessary functions
@@ -0,0 +1,274 @@
+import csv
+import hashlib
+import json
+import os
+import re
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+INDEX_FILE = "index.json"
+
+
+def column_key(header: str) -> str:
+    """ name of the column in the store: the csv header without its unit, e.g. rotation_speed(°/s) -> rotation_speed """
+    return re.sub(r"\(.*\)", "", header).strip()
+
+
+class CalibrationStore:
+    """
+    columnar storage of acquisition data.
+    Each acquisition run is saved as one segment: a numpy structured array (.npy) whose rows are grouped by step.
+    The segments are memory-mapped when loaded, so a step is a slice of the file and is not copied.
+    New runs are only ever appended as new segments, compact() merges them back into one.
+    Each imported csv file is recorded with the hash of its content and the segment that holds its rows.
+    """
+
+    def __init__(self, path: str):
+        """
+        open an existing store
+        :param path: directory of the store
+        """
+        self._path = path
+        with open(os.path.join(path, INDEX_FILE), encoding="utf-8") as infile:
+            self._index = json.load(infile)
+
+        self._segments = [None] * len(self._index["segments"])
+        self._steps = {}  # step -> [(segment, start, stop)] in order of acquisition
+        for i, segment in enumerate(self._index["segments"]):
+            self._register(i, segment)
+
+    @classmethod
+    def create(cls, path: str, headers: list, group_by: Optional[str] = None) -> "CalibrationStore":
+        """
+        create an empty store
+        :param path: directory of the store
+        :param headers: csv headers of the columns
+        :param group_by: header of the column used to group the rows (the steps), None to keep the rows as they are
+        """
+        os.makedirs(path, exist_ok=True)
+        index = {
+            "headers": headers,
+            "group_by": None if group_by is None else column_key(group_by),
+            "segments": [],
+            "sources": [],
+            "next_segment": 0
+        }
+        cls._save_index(path, index)
+
+        return cls(path)
+
+    @classmethod
+    def from_csv(cls, csv_path: str, group_by: Optional[str] = None, path: Optional[str] = None) -> "CalibrationStore":
+        """
+        open the store of a csv file, the store is created and the csv imported on first use.
+        The store mirrors the file: when its content changed, the rows imported from it are replaced
+        :param csv_path: path of the csv file
+        :param group_by: header of the column used to group the rows
+        :param path: directory of the store, next to the csv (same name with the .store extension) by default
+        """
+        path = path or f"{os.path.splitext(csv_path)[0]}.store"
+
+        if os.path.exists(os.path.join(path, INDEX_FILE)):
+            store = cls(path)
+            group_by = None if group_by is None else column_key(group_by)
+            if store._index["group_by"] != group_by:
+                raise ValueError(f"{path}: the store is grouped by {store._index['group_by']}, not by {group_by}")
+        else:
+            with open(csv_path, encoding="utf-8") as infile:
+                headers = next(csv.reader(infile))
+            store = cls.create(path=path, headers=headers, group_by=group_by)
+
+        store.import_csv(csv_path, replace=True)
+        return store
+
+    @property
+    def columns(self) -> list:
+        """ names of the columns """
+        return [column_key(header) for header in self._index["headers"]]
+
+    @property
+    def steps(self) -> list:
+        """ the steps in order of acquisition """
+        return list(self._steps)
+
+    def __len__(self) -> int:
+        return sum(segment["rows"] for segment in self._index["segments"])
+
+    def append(self, columns: dict) -> Optional[str]:
+        """
+        append the rows of a new acquisition run
+        :param columns: one array per column, keyed by column name or csv header
+        :return: file name of the new segment, None when there is no row
+        """
+        columns = {column_key(key): np.asarray(value) for key, value in columns.items()}
+        rows = len(next(iter(columns.values())))
+        if rows == 0:
+            return None
+
+        group_by = self._index["group_by"]
+        segment = np.empty(rows, dtype=self._dtype())
+        for key in self.columns:
+            segment[key] = columns[key]
+
+        steps = []
+        if group_by is not None:
+            # the rows are grouped by step while keeping the order of acquisition within and between the steps
+            values, first, rank = np.unique(segment[group_by], return_index=True, return_inverse=True)
+            order = np.argsort(first)
+            segment = segment[np.argsort(np.argsort(order)[rank], kind="stable")]
+
+            counts = np.bincount(rank)[order]
+            stops = np.cumsum(counts)
+            steps = [[int(step), int(stop - count), int(stop)] for step, count, stop in zip(values[order], counts, stops)]
+
+        # a new file every time: a segment is never rewritten while it may still be memory-mapped
+        file_name = f"segment_{self._index['next_segment']:05d}.npy"
+        np.save(os.path.join(self._path, file_name), segment)
+        self._index["next_segment"] += 1
+
+        self._index["segments"].append({"file": file_name, "rows": rows, "steps": steps})
+        self._segments.append(None)
+        self._register(len(self._segments) - 1, self._index["segments"][-1])
+        self._save_index(self._path, self._index)
+
+        return file_name
+
+    def import_csv(self, csv_path: str, replace: bool = False) -> bool:
+        """
+        append the content of a csv file as a new segment, a content that was already imported is skipped
+        :param replace: replace the rows previously imported from a file of the same name instead of keeping them
+        :return: True if the file was imported
+        """
+        with open(csv_path, "rb") as infile:
+            content = infile.read()
+
+        file_name = os.path.basename(csv_path)
+        sha256 = hashlib.sha256(content).hexdigest()
+        if any(source.get("sha256") == sha256 for source in self._index["sources"]):
+            return False
+
+        lines = content.decode("utf-8").splitlines()
+        headers = next(csv.reader(lines[:1]))
+        if [column_key(header) for header in headers] != self.columns:
+            raise ValueError(f"{csv_path}: the columns {headers} do not match the store {self._index['headers']}")
+
+        # a run interrupted before its first row leaves only the header
+        values = np.empty((0, len(self.columns)))
+        if any(line.strip() for line in lines[1:]):
+            values = np.loadtxt(lines[1:], delimiter=",", ndmin=2).reshape(-1, len(self.columns))
+        if replace:
+            self._remove_source(file_name)
+
+        segment = self.append({key: values[:, i] for i, key in enumerate(self.columns)})
+
+        self._index["sources"].append({"file": file_name, "sha256": sha256, "segment": segment})
+        self._save_index(self._path, self._index)
+        return True
+
+    def export_csv(self, csv_path: str) -> None:
+        """ write the whole store in a csv file, with the original headers """
+        data = self.load()
+        with open(csv_path, "w", encoding="utf-8", newline="") as outfile:
+            writer = csv.writer(outfile, lineterminator="\n")
+            writer.writerow(self._index["headers"])
+            writer.writerows(zip(*(data[key].tolist() for key in self.columns)))
+
+    def load(self) -> np.ndarray:
+        """ all the rows, without copy when the store holds a single segment """
+        if len(self._segments) == 1:
+            return self._segment(0)
+        if not self._segments:
+            return np.empty(0, dtype=self._dtype())
+
+        return np.concatenate([self._segment(i) for i in range(len(self._segments))])
+
+    def group(self, step: int) -> np.ndarray:
+        """ the rows of one step, without copy when the step was acquired in a single run """
+        parts = [self._segment(i)[start:stop] for i, start, stop in self._steps[step]]
+
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def groups(self) -> Iterator[tuple]:
+        """ iterate over (step, rows) in order of acquisition """
+        for step in self.steps:
+            yield step, self.group(step)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """ the whole store as a DataFrame with the original headers """
+        data = self.load()
+        return pd.DataFrame({header: data[column_key(header)] for header in self._index["headers"]})
+
+    def compact(self) -> None:
+        """ merge every segment into a single one, so that each step is a contiguous slice again """
+        if len(self._segments) <= 1:
+            return
+
+        rows = np.concatenate([self.group(step) for step in self.steps]) if self._index["group_by"] else self.load()
+        old_files = [segment["file"] for segment in self._index["segments"]]
+
+        self._index["segments"] = []
+        self._segments = []
+        self._steps = {}
+        segment = self.append({key: rows[key] for key in self.columns})
+
+        for source in self._index["sources"]:
+            source["segment"] = segment
+        self._save_index(self._path, self._index)
+
+        for file_name in old_files:
+            os.remove(os.path.join(self._path, file_name))
+
+    def _remove_source(self, file_name: str) -> None:
+        """ remove the rows imported from a csv file """
+        removed = [source for source in self._index["sources"] if source["file"] == file_name]
+        if not removed:
+            return
+
+        others = [source for source in self._index["sources"] if source["file"] != file_name]
+        segments = {source["segment"] for source in removed if "segment" in source} - {None}
+        if any("segment" not in source for source in removed) or \
+                any(source.get("segment") in segments for source in others):
+            raise ValueError(f"{file_name} was compacted with other runs or imported by an older version: "
+                             f"its rows cannot be replaced, create the store again")
+
+        self._index["sources"] = others
+        kept = [i for i, segment in enumerate(self._index["segments"]) if segment["file"] not in segments]
+        self._index["segments"] = [self._index["segments"][i] for i in kept]
+        self._segments = [self._segments[i] for i in kept]
+
+        self._steps = {}
+        for i, segment in enumerate(self._index["segments"]):
+            self._register(i, segment)
+        self._save_index(self._path, self._index)
+
+        for segment in segments:
+            os.remove(os.path.join(self._path, segment))
+
+    def _dtype(self) -> list:
+        """ the group column holds integers, every other column floats """
+        group_by = self._index["group_by"]
+        return [(key, np.int64 if key == group_by else np.float64) for key in self.columns]
+
+    def _register(self, i: int, segment: dict) -> None:
+        """ add the steps of a segment to the index in memory """
+        for step, start, stop in segment["steps"]:
+            self._steps.setdefault(step, []).append((i, start, stop))
+
+    def _segment(self, i: int) -> np.ndarray:
+        """ memory-map a segment """
+        if self._segments[i] is None:
+            file_name = self._index["segments"][i]["file"]
+            self._segments[i] = np.load(os.path.join(self._path, file_name), mmap_mode="r")
+
+        return self._segments[i]
+
+    @staticmethod
+    def _save_index(path: str, index: dict) -> None:
+        """ write the index through a temporary file so that an interrupted write never corrupts the store """
+        tmp_path = os.path.join(path, f"{INDEX_FILE}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as outfile:
+            json.dump(index, outfile, indent=4, ensure_ascii=False)
+
+        os.replace(tmp_path, os.path.join(path, INDEX_FILE))
@@ -0,0 +1,207 @@
+import argparse
+import glob
+import hashlib
+import html
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+matplotlib.use("Agg")  # headless: the figures are only written to files
+
+import create_speed_config  # noqa: E402
+import dataset_store  # noqa: E402
+import visualize_data_rotation  # noqa: E402
+from sklearn.metrics import mean_absolute_error  # noqa: E402
+
+TIME_ANALYSIS = "time_analysis_raspberry_pico_"
+ROTATION_RESULTS = "data_rotation_results_"
+CACHE_FILE = "cache.json"
+DATA_DIR = "data"  # copy of the rendered csv files and their stores, inside the output folder
+SETTINGS = {
+    "init_params_model": create_speed_config.INIT_PARAMS_MODEL,
+    "min_mae": create_speed_config.MIN_MAE,
+    "max_speed_servo_specs": create_speed_config.MAX_SPEED_SERVO_SPECS
+}
+
+
+def find_servos(data_dir: str) -> dict:
+    """
+    list the servos that have acquisition data
+    :return: name of the servo -> {"time_analysis": csv path, "rotation_results": csv path}
+    """
+    servos = {}
+    for kind, prefix in [("time_analysis", TIME_ANALYSIS), ("rotation_results", ROTATION_RESULTS)]:
+        for path in sorted(glob.glob(os.path.join(data_dir, f"{prefix}*.csv"))):
+            name_servo = re.sub(rf"^{prefix}|\.csv$", "", os.path.basename(path))
+            servos.setdefault(name_servo, {})[kind] = path
+
+    return servos
+
+
+def cache_key(content: bytes, settings: dict) -> str:
+    """
+    fingerprint of everything a figure depends on: the data, the settings and the code that renders it
+    :param content: content of the csv file
+    """
+    digest = hashlib.sha256(content)
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+
+    for path in [create_speed_config.__file__, dataset_store.__file__, visualize_data_rotation.__file__, __file__]:
+        with open(path, "rb") as infile:
+            digest.update(infile.read())
+
+    return digest.hexdigest()
+
+
+def render_fit(name_servo: str, csv_path: str, output_dir: str) -> dict:
+    """
+    regression of every step: 3D plot of the fit and table of the bands.
+    No figure is plotted when no step reaches the MAE threshold
+    """
+    figure = f"{name_servo}_fit.png"
+    store = dataset_store.CalibrationStore.from_csv(csv_path, group_by="steps")
+
+    parameters, max_speed_all, min_speed_all = \
+        create_speed_config.build_params(
+            groups=create_speed_config.groups_from_store(
+                store=store, max_speed_servo_specs=create_speed_config.MAX_SPEED_SERVO_SPECS),
+            init_params_model=create_speed_config.INIT_PARAMS_MODEL, min_mae=create_speed_config.MIN_MAE,
+            max_speed_servo_specs=create_speed_config.MAX_SPEED_SERVO_SPECS, plot_graph=True,
+            plot_path=os.path.join(output_dir, figure)
+        )
+
+    clean_parameters = \
+        create_speed_config.clean_up_parameters(
+            parameters=parameters, max_speed_all=max_speed_all, min_speed_all=min_speed_all) if parameters else {}
+
+    bands = [
+        {"step": step, "min_speed": value["min_speed"], "max_speed": value["max_speed"], "mae": value["mae"],
+         "kept": step in clean_parameters}
+        for step, value in sorted(parameters.items(), reverse=True)
+    ]
+
+    return {"figure": figure if parameters else None, "bands": bands, "min_speed": min_speed_all,
+            "max_speed": max_speed_all}
+
+
+def render_linearity(name_servo: str, csv_path: str, output_dir: str) -> dict:
+    """ linear regression of the rotation speed against the percentage of speed, no figure without data """
+    figure = f"{name_servo}_linearity.png"
+    if len(dataset_store.CalibrationStore.from_csv(csv_path)) == 0:
+        return {"figure": None}
+
+    x, y, y_p, slope, intercept, pearson = visualize_data_rotation.fit(csv_path)
+    text = visualize_data_rotation.describe(slope=slope, intercept=intercept, pearson=pearson)
+    visualize_data_rotation.plot(x, y, y_p, text, path=os.path.join(output_dir, figure))
+
+    return {"figure": figure, "slope": slope, "intercept": intercept, "pearson": pearson,
+            "mae": mean_absolute_error(y, y_p)}
+
+
+RENDERERS = {"time_analysis": render_fit, "rotation_results": render_linearity}
+
+
+def build_html(servos: dict, results: dict) -> str:
+    """ static page with the figures and the tables of every servo """
+    sections = []
+    for name_servo in servos:
+        sections.append(f"<h2>{html.escape(name_servo)}</h2>")
+
+        fit = results.get((name_servo, "time_analysis"))
+        if fit is not None and fit["figure"] is None:
+            sections.append("<h3>Speed configuration: no step reached the MAE threshold</h3>")
+        elif fit is not None:
+            rows = "".join(
+                f"<tr><td>{band['step']}</td><td>{band['min_speed']}</td><td>{band['max_speed']}</td>"
+                f"<td>{html.escape(band['mae'])}</td><td>{'yes' if band['kept'] else ''}</td></tr>"
+                for band in fit["bands"]
+            )
+            sections.append(
+                f"<h3>Speed configuration: {fit['min_speed']} to {fit['max_speed']} °/s</h3>"
+                f"<img src=\"{fit['figure']}\">"
+                f"<table><tr><th>step</th><th>min speed (°/s)</th><th>max speed (°/s)</th><th>MAE</th>"
+                f"<th>kept</th></tr>{rows}</table>"
+            )
+
+        linearity = results.get((name_servo, "rotation_results"))
+        if linearity is not None and linearity["figure"] is None:
+            sections.append("<h3>Linearity: no data</h3>")
+        elif linearity is not None:
+            sections.append(
+                f"<h3>Linearity</h3>"
+                f"<img src=\"{linearity['figure']}\">"
+                f"<table><tr><th>slope</th><th>intercept</th><th>Pearson</th><th>MAE (°/s)</th></tr>"
+                f"<tr><td>{linearity['slope']:.2f}</td><td>{linearity['intercept']:.2f}</td>"
+                f"<td>{linearity['pearson']:.4f}</td><td>{linearity['mae']:.4f}</td></tr></table>"
+            )
+
+    return "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Servo calibration report</title>" \
+           "<style>table{border-collapse:collapse}td,th{border:1px solid #999;padding:2px 8px}</style></head>" \
+           f"<body><h1>Servo calibration report</h1>{''.join(sections)}</body></html>\n"
+
+
+def run(data_dir: str = "data", output_dir: str = "report", workers: int = None) -> str:
+    """
+    render the report of every servo found in data_dir.
+    The figures are rendered in parallel, a figure whose data, settings and code did not change is not rendered again.
+    data_dir is only read: a figure is rendered from a copy of the csv content its cache key was computed on,
+    written with its store in output_dir/data.
+    :return: path of the html page
+    """
+    os.makedirs(os.path.join(output_dir, DATA_DIR), exist_ok=True)
+    cache_path = os.path.join(output_dir, CACHE_FILE)
+    cache = create_speed_config.load_json(cache_path) if os.path.exists(cache_path) else {}
+
+    servos = find_servos(data_dir)
+    results = {}
+    new_cache = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for name_servo, paths in servos.items():
+            for kind, csv_path in paths.items():
+                job = f"{name_servo}/{kind}"
+                with open(csv_path, "rb") as infile:
+                    content = infile.read()
+                key = cache_key(content, SETTINGS)
+                cached = cache.get(job)
+
+                # a result without figure is complete as well
+                figure = None if cached is None else cached["result"]["figure"]
+                if cached is not None and cached["key"] == key and \
+                        (figure is None or os.path.exists(os.path.join(output_dir, figure))):
+                    results[(name_servo, kind)] = cached["result"]
+                    new_cache[job] = cached
+                    continue
+
+                copy_path = os.path.join(output_dir, DATA_DIR, os.path.basename(csv_path))
+                with open(copy_path, "wb") as outfile:
+                    outfile.write(content)
+
+                futures[(name_servo, kind)] = (key, executor.submit(RENDERERS[kind], name_servo, copy_path, output_dir))
+
+        for (name_servo, kind), (key, future) in futures.items():
+            results[(name_servo, kind)] = future.result()
+            new_cache[f"{name_servo}/{kind}"] = {"key": key, "result": results[(name_servo, kind)]}
+
+    create_speed_config.save_json(path=cache_path, json_to_save=new_cache)
+
+    path = os.path.join(output_dir, "index.html")
+    with open(path, "w", encoding="utf-8") as outfile:
+        outfile.write(build_html(servos, results))
+
+    print(f"report: {path} ({len(futures)} rendered, {len(results) - len(futures)} from the cache)")
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="render the calibration report of every servo, without display")
+    parser.add_argument("--data", default="data", help="folder of the acquisition csv files")
+    parser.add_argument("--output", default="report", help="folder of the report")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (all the cpus by default)")
+    args = parser.parse_args()
+
+    run(data_dir=args.data, output_dir=args.output, workers=args.workers)
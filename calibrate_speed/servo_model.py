@@ -0,0 +1,230 @@
+import copy
+import math
+from typing import Optional
+
+import numpy as np
+from scipy.optimize import minimize
+
+import simulated_hal
+
+SPEED_COLUMN = "rotation_speed(°/s)"
+
+
+class ServoModel:
+    """
+    host-side model of a servo driven by the Raspberry Pi Pico:
+    - the duty cycle is converted to an angle with the mapping of ServoController (min_duty, max_duty, max_angle)
+    - the servo reads the duty cycle once per PWM period
+    - it turns towards the target at slew_rate at most, and does not move for an error smaller than the deadband
+    - each duty cycle write costs write_overhead_us to the firmware, the photo interrupter answers after latency_us
+    - noise is the relative standard deviation of the measured rotation time
+    """
+
+    def __init__(self, max_angle: int = 180, min_duty: int = 1500, max_duty: int = 7500, freq: int = 50,
+                 slew_rate: float = 400., deadband: float = 0.5, write_overhead_us: float = 15.,
+                 latency_us: float = 0., noise: float = 0.):
+        """
+        init function
+        :param slew_rate: maximum rotation speed (°/s)
+        :param deadband: smallest error (°) the servo corrects
+        """
+        self.max_angle = max_angle
+        self.min_duty = min_duty
+        self.max_duty = max_duty
+        self.pwm_period_us = 10 ** 6 / freq
+        self.slew_rate = slew_rate
+        self.deadband = deadband
+        self.write_overhead_us = write_overhead_us
+        self.latency_us = latency_us
+        self.noise = noise
+
+    @classmethod
+    def from_conf(cls, conf: dict, **params) -> "ServoModel":
+        """ model of a servo of params/servo_params.json """
+        return cls(max_angle=conf.get("max_angle", 180), min_duty=conf.get("min_duty", 1500),
+                   max_duty=conf.get("max_duty", 7500), **params)
+
+    @property
+    def params(self) -> dict:
+        """ the physical parameters, as accepted by from_conf """
+        return {"slew_rate": self.slew_rate, "deadband": self.deadband, "write_overhead_us": self.write_overhead_us,
+                "latency_us": self.latency_us, "noise": self.noise}
+
+    def angle_to_duty(self, angle):
+        """ same conversion as ServoController._angle_to_duty, on scalars or arrays """
+        duty = ((self.max_angle // 2) - np.asarray(angle)) * (self.max_duty - self.min_duty) / self.max_angle \
+            + self.min_duty
+        return duty.astype(np.int64)
+
+    def duty_to_angle(self, duty):
+        """ angle reached by the servo for a duty cycle, on scalars or arrays """
+        return (self.max_angle // 2) - (np.asarray(duty) - self.min_duty) * self.max_angle / (
+            self.max_duty - self.min_duty)
+
+    def rotation_time(self, steps, waiting_time_us, start_angle: float = -90, end_angle: float = 90,
+                      rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+        time (s) measured by the acquisition firmware for one rotation, on arrays of any shape.
+        ServoController.go_to_position of the acquisition writes the duty cycle by increments of
+        int(max_angle / steps) and waits waiting_time_us after each write.
+        The rotation ends when the command got within the deadband of the end angle and the servo read it,
+        or when the servo turned at its slew rate, whichever comes last.
+        :param rng: random generator for the PWM phase and the noise, None for the expected time without noise
+        """
+        steps, waiting_time_us = np.broadcast_arrays(np.asarray(steps), np.asarray(waiting_time_us, dtype=float))
+
+        increment = np.floor(self.max_angle / steps)
+        if np.any(increment < 1):
+            raise ValueError(f"steps must be between 1 and max_angle ({self.max_angle})")
+
+        distance = abs(int(self.angle_to_duty(end_angle)) - int(self.angle_to_duty(start_angle)))
+        deadband = self.deadband * (self.max_duty - self.min_duty) / self.max_angle
+
+        # index of the first write that brings the command within the deadband of the end angle
+        writes = np.ceil(max(distance - deadband, 0) / increment)
+        writes = np.where(increment >= abs(end_angle - start_angle), 0, writes)
+        command_time = (writes + 1) * self.write_overhead_us + writes * waiting_time_us
+
+        # the servo reads the duty cycle at phase + k * period
+        if rng is None:
+            phase = self.pwm_period_us / 2
+        else:
+            phase = rng.uniform(0, self.pwm_period_us, steps.shape)
+        seen_time = phase + np.maximum(np.ceil((command_time - phase) / self.pwm_period_us), 0) * self.pwm_period_us
+        slew_time = phase + (abs(end_angle - start_angle) - self.deadband) / self.slew_rate * 10 ** 6
+
+        rotation_time = (np.maximum(seen_time, slew_time) + self.latency_us) / 10 ** 6
+        if rng is not None and self.noise:
+            rotation_time = rotation_time * (1 + rng.normal(0, self.noise, steps.shape))
+
+        return rotation_time
+
+    def time_analysis(self, steps, waiting_time_s, seed: Optional[int] = 0) -> dict:
+        """
+        synthetic acquisition data, one row per (steps, waiting_time_s) pair
+        :return: the columns of time_analysis_raspberry_pico_*.csv, ready for CalibrationStore.append
+        """
+        steps, waiting_time_s = np.broadcast_arrays(np.asarray(steps), np.asarray(waiting_time_s, dtype=float))
+        rng = None if seed is None else np.random.default_rng(seed)
+
+        rotation_time = self.rotation_time(steps, waiting_time_s * 10 ** 6, rng=rng)
+
+        return {SPEED_COLUMN: (180 / rotation_time).ravel(), "steps": steps.ravel(),
+                "waiting_time(s)": waiting_time_s.ravel()}
+
+    @classmethod
+    def fit(cls, conf: dict, steps, waiting_time_s, rotation_speed, deadband: float = 0.5) -> "ServoModel":
+        """
+        fit the slew rate, the write overhead, the latency and the noise on acquisition data.
+        The deadband cannot be told apart from the latency by this data, it is given.
+        :param conf: configuration of the servo (params/servo_params.json)
+        """
+        steps = np.asarray(steps)
+        waiting_time_us = np.asarray(waiting_time_s) * 10 ** 6
+        rotation_time = 180 / np.asarray(rotation_speed)
+
+        def mse(params: list) -> float:
+            slew_rate, write_overhead_us, latency_us = np.abs(params)
+            model = cls.from_conf(conf, slew_rate=slew_rate, deadband=deadband,
+                                  write_overhead_us=write_overhead_us, latency_us=latency_us)
+            return float(np.mean((model.rotation_time(steps, waiting_time_us) - rotation_time) ** 2))
+
+        init_params = [np.max(rotation_speed), 10., 0.]
+        res = minimize(mse, np.array(init_params), method="Nelder-Mead", options={"xatol": 1e-3, "fatol": 1e-9})
+        slew_rate, write_overhead_us, latency_us = np.abs(res.x)
+
+        model = cls.from_conf(conf, slew_rate=float(slew_rate), deadband=deadband,
+                              write_overhead_us=float(write_overhead_us), latency_us=float(latency_us))
+        model.noise = float(np.std(rotation_time / model.rotation_time(steps, waiting_time_us) - 1))
+
+        return model
+
+
+class SimulatedServo:
+    """
+    plug a ServoModel into the simulated HAL: the duty cycle written on the signal pin drives the model
+    and the photo interrupter pin reads 1 once the servo reached the sensor.
+    The noise of the model is applied to the slew rate of each move.
+    """
+
+    def __init__(self, model: ServoModel, signal_pin: int = 0, sensor_pin: int = 1, sensor_angle: float = 90,
+                 angle: float = 0, fast_forward: bool = True, seed: Optional[int] = 0):
+        """
+        init function
+        :param sensor_angle: angle of the photo interrupter, it is triggered within the deadband of this angle
+        :param angle: initial angle of the servo
+        :param fast_forward: when the firmware polls the sensor before the servo reached it, jump the virtual clock
+            to the moment it does instead of returning 0 for every poll of the busy loop
+        """
+        self.model = model
+        self.signal_pin = signal_pin
+        self.sensor_angle = sensor_angle
+        self.fast_forward = fast_forward
+        self._rng = np.random.default_rng(seed)
+
+        self.angle = angle
+        self._target = angle
+        self._command = angle
+        self._slew_rate = model.slew_rate
+        self._time = simulated_hal.board.now_us
+        self._next_sample = self._time + self._rng.uniform(0, model.pwm_period_us)
+
+        simulated_hal.add_duty_listener(self._on_duty)
+        simulated_hal.set_pin_reader(sensor_pin, self._read_sensor)
+
+    def advance(self, time_us: float) -> None:
+        """ move the servo up to time_us """
+        while self._time < time_us:
+            stop = min(time_us, self._next_sample)
+            error = self._target - self.angle
+            if error:
+                move = self._slew_rate * (stop - self._time) / 10 ** 6
+                self.angle += math.copysign(min(move, abs(error)), error)
+            self._time = stop
+
+            if self._time == self._next_sample:
+                # the servo reads the duty cycle and ignores the errors smaller than the deadband
+                if abs(self._command - self.angle) > self.model.deadband:
+                    if self._target == self.angle:
+                        # a new move
+                        jitter = self._rng.normal(0, self.model.noise) if self.model.noise else 0
+                        self._slew_rate = self.model.slew_rate / max(1 + jitter, 0.1)
+                    self._target = self._command
+                self._next_sample += self.model.pwm_period_us
+
+    def _on_duty(self, time_us: int, pin_id: int, duty: int) -> None:
+        """ a new command: the firmware also spends the write overhead """
+        if pin_id != self.signal_pin:
+            return
+
+        self.advance(time_us)
+        self._command = float(self.model.duty_to_angle(duty))
+        simulated_hal.board.advance_us(self.model.write_overhead_us)
+
+    def _triggered(self) -> bool:
+        return self.angle >= self.sensor_angle - self.model.deadband
+
+    def _read_sensor(self, time_us: int) -> int:
+        """ level of the photo interrupter """
+        self.advance(time_us)
+        if self._triggered() or not self.fast_forward:
+            return int(self._triggered())
+
+        # nothing is written while the firmware polls: look ahead on a copy for the moment the sensor triggers
+        ahead = copy.copy(self)
+        ahead._rng = copy.deepcopy(self._rng)  # the look ahead draws the same noise as the servo will
+        horizon = time_us + 2 * self.model.pwm_period_us + 2 * 180 / self.model.slew_rate * 10 ** 6
+        time_before, angle_before, slew_rate = ahead._time, ahead.angle, ahead._slew_rate
+        while not ahead._triggered() and ahead._time < horizon:
+            time_before, angle_before, slew_rate = ahead._time, ahead.angle, ahead._slew_rate
+            ahead.advance(min(ahead._next_sample, horizon))
+
+        if not ahead._triggered():
+            return 0
+
+        # between two samples the servo turns at its slew rate: find the exact crossing
+        distance = self.sensor_angle - self.model.deadband - angle_before
+        crossing = max(math.ceil(time_before + distance / slew_rate * 10 ** 6), time_us)
+        simulated_hal.board.advance_us(crossing - time_us)
+        self.advance(crossing)
+        return int(self._triggered())
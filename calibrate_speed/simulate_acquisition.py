@@ -0,0 +1,82 @@
+import importlib.util
+import os
+import shutil
+import sys
+from typing import Optional
+
+import simulated_hal
+from create_speed_config import load_json
+from dataset_store import CalibrationStore
+from servo_model import ServoModel, SimulatedServo
+
+ACQUISITION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "upload_to_rpp_for_data_acquisition")
+PATH_CONFIG = os.path.join(ACQUISITION_DIR, "params", "servo_params.json")
+
+
+def fit_model(name_servo: str, data_dir: str = "data", store_path: Optional[str] = None) -> ServoModel:
+    """
+    fit the model of a servo on its acquisition data
+    :param store_path: directory of the store of the csv, next to the csv by default
+    """
+    conf = load_json(PATH_CONFIG)[name_servo]
+    data = CalibrationStore.from_csv(
+        os.path.join(data_dir, f"time_analysis_raspberry_pico_{name_servo}.csv"), group_by="steps",
+        path=store_path).load()
+
+    return ServoModel.fit(conf, data["steps"], data["waiting_time"], data["rotation_speed"])
+
+
+def load_acquisition(model: ServoModel, name_servo: str, output_dir: str) -> type:
+    """
+    import the acquisition firmware (upload_to_rpp_for_data_acquisition/main.py) on top of the simulated HAL
+    driving the model. The firmware reads its configuration and writes its results in the current folder:
+    the configuration is copied into output_dir, from which the firmware has to be run.
+    :return: the Main class of the firmware for this servo
+    """
+    simulated_hal.install().reset()
+    SimulatedServo(model)
+
+    if ACQUISITION_DIR not in sys.path:
+        sys.path.insert(0, ACQUISITION_DIR)
+    spec = importlib.util.spec_from_file_location("acquisition_main", os.path.join(ACQUISITION_DIR, "main.py"))
+    main = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(main)
+
+    os.makedirs(os.path.join(output_dir, "params"), exist_ok=True)
+    shutil.copy(PATH_CONFIG, os.path.join(output_dir, "params", "servo_params.json"))
+
+    return type("Main", (main.Main,), {"SERVO_NAME": name_servo})
+
+
+def run_acquisition(model: ServoModel, name_servo: str, output_dir: str) -> str:
+    """
+    run the whole acquisition firmware against the model
+    :return: path of the csv written by the firmware
+    """
+    main = load_acquisition(model=model, name_servo=name_servo, output_dir=output_dir)
+
+    cwd = os.getcwd()
+    os.chdir(output_dir)
+    try:
+        main().run()
+    finally:
+        os.chdir(cwd)
+
+    return os.path.join(output_dir, f"{main.FILE_NAME}_{name_servo}.csv")
+
+
+def run():
+    """ core method to perform the simulation """
+    name_servo = "servo_sg9"
+    output_dir = "simulation"
+
+    # data/ is only read, the store is kept with the results of the simulation
+    model = fit_model(name_servo, store_path=os.path.join(output_dir, f"time_analysis_{name_servo}.store"))
+    print(f"{name_servo}: {model.params}")
+
+    path = run_acquisition(model=model, name_servo=name_servo, output_dir=output_dir)
+    print(f"simulated acquisition: {path}")
+
+
+if __name__ == '__main__':
+    run()
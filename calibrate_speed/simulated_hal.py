@@ -0,0 +1,141 @@
+import sys
+import types
+from typing import Callable, Optional
+
+
+class Board:
+    """
+    host-side state shared by the simulated MicroPython modules.
+    The clock is virtual: sleeping advances it instead of blocking, so the firmware runs as fast as the host allows
+    """
+
+    def __init__(self):
+        """
+        init function
+        """
+        self.now_us = 0  # virtual time in microseconds
+        self.pwm_writes = 0  # number of duty cycle writes on every PWM
+        self.duty_listeners = []  # callables(time_us, pin_id, duty) notified on each duty cycle write
+        self.pin_readers = {}  # pin_id -> callable(time_us) returning the level of an input pin
+
+    def reset(self) -> None:
+        """ reset the clock, the counters and the hooks """
+        self.__init__()
+
+    def advance_us(self, duration_us: float) -> None:
+        """ move the virtual clock forward """
+        self.now_us += int(duration_us)
+
+
+board = Board()
+
+
+class Pin:
+    """ stand-in for machine.Pin """
+    IN = 0
+    OUT = 1
+    PULL_UP = 1
+    PULL_DOWN = 2
+
+    def __init__(self, pin_id: int, mode: int = -1, pull: int = -1, value: Optional[int] = None):
+        self.id = pin_id
+        self.mode = mode
+        self.pull = pull
+        self._value = 0 if value is None else value
+
+    def value(self, value: Optional[int] = None) -> Optional[int]:
+        """ read the level of the pin (through the reader registered on the board if any) or set it """
+        if value is not None:
+            self._value = value
+            return None
+
+        reader = board.pin_readers.get(self.id)
+        return reader(board.now_us) if reader is not None else self._value
+
+
+class PWM:
+    """ stand-in for machine.PWM """
+
+    def __init__(self, pin: Pin):
+        self._pin = pin
+        self._freq = 0
+        self._duty = 0
+
+    def freq(self, value: Optional[int] = None) -> Optional[int]:
+        """ get or set the frequency """
+        if value is None:
+            return self._freq
+        self._freq = value
+        return None
+
+    def duty_u16(self, value: Optional[int] = None) -> Optional[int]:
+        """ get or set the duty cycle, every write is counted and forwarded to the listeners """
+        if value is None:
+            return self._duty
+
+        self._duty = value
+        board.pwm_writes += 1
+        for listener in board.duty_listeners:
+            listener(board.now_us, self._pin.id, value)
+        return None
+
+    def deinit(self) -> None:
+        """ release the PWM """
+
+
+def sleep(seconds: float) -> None:
+    board.advance_us(seconds * 10 ** 6)
+
+
+def sleep_ms(duration_ms: float) -> None:
+    board.advance_us(duration_ms * 10 ** 3)
+
+
+def sleep_us(duration_us: float) -> None:
+    board.advance_us(duration_us)
+
+
+def ticks_us() -> int:
+    return board.now_us
+
+
+def ticks_ms() -> int:
+    return board.now_us // 10 ** 3
+
+
+def ticks_diff(ticks_1: int, ticks_2: int) -> int:
+    return ticks_1 - ticks_2
+
+
+def ticks_add(ticks: int, delta: int) -> int:
+    return ticks + delta
+
+
+def _module(name: str, attributes: dict) -> types.ModuleType:
+    """ build a module object out of a dict of attributes """
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+
+def install() -> Board:
+    """
+    register the simulated ``machine`` and ``utime`` modules so that the firmware can be imported on the host
+    :return: the board holding the virtual clock and the hooks
+    """
+    sys.modules["machine"] = _module("machine", {"Pin": Pin, "PWM": PWM})
+    sys.modules["utime"] = _module("utime", {
+        "sleep": sleep, "sleep_ms": sleep_ms, "sleep_us": sleep_us, "ticks_us": ticks_us,
+        "ticks_ms": ticks_ms, "ticks_diff": ticks_diff, "ticks_add": ticks_add
+    })
+    return board
+
+
+def add_duty_listener(listener: Callable[[int, int, int], None]) -> None:
+    """ be notified (time_us, pin_id, duty) each time the firmware writes a duty cycle """
+    board.duty_listeners.append(listener)
+
+
+def set_pin_reader(pin_id: int, reader: Callable[[int], int]) -> None:
+    """ drive the level of an input pin from a function of the virtual time """
+    board.pin_readers[pin_id] = reader
@@ -13,6 +13,7 @@ class ServoController:
         """
         self._servo = PWM(Pin(signal_pin))
         self._servo.freq(freq)
+        self._pwm_period = 10 ** 6 / freq  # the servo reads the duty cycle once per period (us)
 
         self._max_angle = conf.get("max_angle", 180)  # maximum operating angle
         self._min_duty = conf.get("min_duty", 1500)  # minimum value of the duty cycle
@@ -22,6 +23,8 @@ class ServoController:
         self._max_speed = conf.get("max_speed_d_s", 600)  # maximum speed of the servo
         self._speed_config = conf.get("speed_config", {})
         self._max_step = max([int(i) for i in self._speed_config.keys()])
+        self._fractional_stepping = conf.get("fractional_stepping", False)  # see _go_to_position_fractional
+        self._write_overhead = conf.get("write_overhead_us", 0)  # time spent on each duty cycle write (us)
 
         self._current_angle = 0
         self.go_to_position(angle=0, percent_speed=100)
@@ -44,6 +47,11 @@ class ServoController:
         value_start = self._angle_to_duty(angle=self._current_angle)
         value_end = self._angle_to_duty(angle=angle)
 
+        if self._fractional_stepping:
+            write_period, step_calc = self._go_to_position_fractional(value_start, value_end, percent_speed)
+            self._current_angle = angle
+            return write_period / (10 ** 6), step_calc
+
         step_calc, waiting_time = self._get_variable_set(percent_speed)
         steps = int(self._max_angle / step_calc)
         increment = steps if value_end - value_start > 0 else -steps
@@ -61,6 +69,40 @@ class ServoController:
 
         return waiting_time / (10 ** 6), step_calc
 
+    def _go_to_position_fractional(self, value_start: int, value_end: int, percent_speed: float) -> tuple:
+        """
+        Move the duty cycle at the exact speed of the calibrated model instead of rounding the increment and
+        the waiting time to integers.
+        The duty cycle is written at most once per PWM period, since the servo cannot see faster updates:
+        each write advances by a fractional number of duty units. As with Bresenham's line algorithm, the exact
+        position and time are accumulated and only their integer parts are used, so the rounding errors do not add up.
+        The calibration measured waiting_time plus the write overhead between two writes of the integer increment:
+        the overhead is part of the time per duty unit, and it is taken out of the sleeps since every write costs it.
+        :return: time between two writes in us, step of the calibrated band
+        """
+        step_calc, waiting_time = self._get_band(percent_speed)
+
+        # time to move the duty cycle by one unit at the requested speed
+        unit_time = (waiting_time + self._write_overhead) / int(self._max_angle / step_calc)
+        write_period = max(self._pwm_period, unit_time)
+        units_per_write = write_period / unit_time
+
+        distance = abs(value_end - value_start)
+        direction = 1 if value_end > value_start else -1
+
+        position = 0.
+        slept = 0
+        while position < distance:
+            position = min(position + units_per_write, distance)
+            self._servo.duty_u16(value_start + direction * int(position))
+
+            # the last write may move less than units_per_write: it also waits less
+            elapsed = int(position * unit_time)
+            sleep_us(int(max(elapsed - slept - self._write_overhead, 0)))
+            slept = elapsed
+
+        return write_period, step_calc
+
     def release(self) -> None:
         """ release the PWM """
         self._servo.deinit()
@@ -72,6 +114,11 @@ class ServoController:
 
     def _get_variable_set(self, percent_speed: float) -> tuple:
         """ calculate the best parameter set to rotate the servo at the desired speed """
+        step, waiting_time = self._get_band(percent_speed)
+        return step, int(round(waiting_time, 1))
+
+    def _get_band(self, percent_speed: float) -> tuple:
+        """ find the calibrated band of the desired speed and the exact waiting time (us) of its model """
         percent_speed = min(100., percent_speed)
         percent_speed = max(0., percent_speed)
 
@@ -89,4 +136,4 @@ class ServoController:
                 # multiplication by 1000.
                 waiting_time = (params[0] / (speed - params[1])) * 1000
 
-                return int(step), int(round(waiting_time, 1))
+                return int(step), waiting_time
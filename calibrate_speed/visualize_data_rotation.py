@@ -1,11 +1,18 @@
+from typing import Optional
+
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 
 from sklearn.linear_model import LinearRegression
 
+from dataset_store import CalibrationStore
+
 
-def plot(x: list, y: list, y_p: list, text: str) -> None:
+def plot(x: list, y: list, y_p: list, text: str, path: Optional[str] = None) -> None:
+    """
+    plot the real speeds and the linear regression
+    :param path: save the graph in this file instead of showing it
+    """
     fig = plt.figure()
     ax = fig.add_subplot()
 
@@ -15,17 +22,24 @@ def plot(x: list, y: list, y_p: list, text: str) -> None:
     ax.set_xlabel('Percentage rotation speed (%)')
     ax.set_ylabel('Rotation speed (°/s)')
 
-    ax.text(0, 500, text, fontsize=12)
+    ax.text(0.02, 0.97, text, fontsize=12, transform=ax.transAxes, verticalalignment="top")
 
-    plt.show()
+    if path is None:
+        plt.show()
+    else:
+        fig.savefig(path)
+        plt.close(fig)
 
 
-def run():
-    """ core method to perform the analysis """
-    df = pd.read_csv("data/data_rotation_results_servo_sg9.csv")
+def fit(csv_path: str) -> tuple:
+    """
+    linear regression of the rotation speed against the percentage of the maximum speed
+    :return: x, y, y_p, slope, intercept, pearson
+    """
+    data = CalibrationStore.from_csv(csv_path).load()
 
-    x = df.iloc[:, :-1].values
-    y = df.iloc[:, 1].values
+    x = data["percent_speed"].reshape(-1, 1)
+    y = data["rotation_speed"]
 
     regr = LinearRegression()
     regr.fit(x, y)
@@ -33,8 +47,19 @@ def run():
     y_p = regr.predict(x)
     rho = np.corrcoef([i[0] for i in x], y)
 
-    res = f"rotation_speed = {round(regr.coef_[0], 2)} * percent_speed + {round(regr.intercept_, 2)} " \
-          f"\nPearson = {round(rho[0, 1], 4)}"
+    return x, y, y_p, regr.coef_[0], regr.intercept_, rho[0, 1]
+
+
+def describe(slope: float, intercept: float, pearson: float) -> str:
+    """ text of the regression """
+    return f"rotation_speed = {round(slope, 2)} * percent_speed + {round(intercept, 2)} " \
+           f"\nPearson = {round(pearson, 4)}"
+
+
+def run():
+    """ core method to perform the analysis """
+    x, y, y_p, slope, intercept, pearson = fit("data/data_rotation_results_servo_sg9.csv")
+    res = describe(slope=slope, intercept=intercept, pearson=pearson)
 
     print(res)
 